@@ -12,32 +12,199 @@ This script:
 Usage:
     python combined_usd_lighting.py --house_name 1LXtFkjw3qL
     python combined_usd_lighting.py --house_name 1LXtFkjw3qL --usd_path /custom/path/to/house.usd
+    python combined_usd_lighting.py --house_name 1LXtFkjw3qL --quiet
+    python combined_usd_lighting.py --house_name 1LXtFkjw3qL 2t7WUuJeko7 --save_usd --exit_after_setup
+    python combined_usd_lighting.py --house_name 1LXtFkjw3qL --dry_run --save_config lights.json
 """
 
-from omni.isaac.kit import SimulationApp
+from __future__ import annotations
 
-# Launch Isaac Sim with GUI
-simulation_app = SimulationApp({
-    "headless": False,
-    "width": 1920,
-    "height": 1080
-})
+import argparse
+import logging
+import sys
+
+# Parse arguments before launching Isaac Sim, so --help and usage errors exit without the Kit boot
+parser = argparse.ArgumentParser(description="Load Matterport USD with intelligent lighting")
+parser.add_argument("--house_name", required=True, nargs='+',
+                    help="House name(s) (e.g., 1LXtFkjw3qL); several houses are processed in one Isaac Sim session")
+parser.add_argument("--usd_path", help="Custom path to USD file (optional)")
+parser.add_argument("--save_config", help="Save lighting configuration (light prim paths and properties) to JSON file")
+parser.add_argument("--debug_coords", action="store_true", help="Show coordinate transformation details")
+parser.add_argument("--exit_after_setup", action="store_true",
+                    help="Render a few frames after lighting is placed, then exit instead of keeping the viewer open")
+parser.add_argument("--save_usd", action="store_true",
+                    help="Export each lit stage as <house_name>_lit.usd next to its source USD file")
+parser.add_argument("--dry_run", "--dry-run", action="store_true",
+                    help="Run parsing and coordinate math only: no Isaac Sim launch and no USD authoring")
+verbosity = parser.add_mutually_exclusive_group()
+verbosity.add_argument("--verbose", action="store_true", help="Also log per-light placement details")
+verbosity.add_argument("--quiet", action="store_true", help="Only log warnings and errors")
+args = parser.parse_args()
+
+# Progress goes through a dedicated logger (Kit installs its own root handlers), formatted like plain
+# prints; with --quiet the info/debug messages below are never formatted at all
+log = logging.getLogger("matterport_lighting")
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(_log_handler)
+log.propagate = False
+log.setLevel(logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO)
+
+if args.dry_run:
+    class DryRunApp:
+        """Stands in for SimulationApp when --dry_run skips the Isaac Sim launch"""
+        
+        def update(self):
+            pass
+        
+        def is_running(self) -> bool:
+            return False
+        
+        def close(self):
+            pass
+    
+    # Nothing below touches omni/pxr in a dry run; the USD modules only exist once Kit is up
+    simulation_app = DryRunApp()
+    omni = UsdGeom = Gf = Usd = Sdf = None
+else:
+    from omni.isaac.kit import SimulationApp
+    
+    # Launch Isaac Sim with GUI
+    simulation_app = SimulationApp({
+        "headless": False,
+        "width": 1920,
+        "height": 1080
+    })
+    
+    import omni.usd
+    from pxr import UsdGeom, Gf, Usd, Sdf
 
-import omni.usd
-from pxr import UsdGeom, UsdLux, Gf, Usd
 import numpy as np
 import time
 import os
-import argparse
 import json
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; transforms fall back to NumPy without it
+    njit = None
+
+# Viewer loop frame budget (~60 Hz), and frames rendered before exiting with --exit_after_setup
+VIEWER_FRAME_TIME = 1.0 / 60.0
+SETTLE_FRAMES = 10
+
+# Bump whenever the layout of parsed house_data changes so stale .pkl sidecars are re-parsed
+HOUSE_CACHE_VERSION = 2
+
+# Columns kept from .house level (L) and region (R) records, and the structured dtypes they load into
+LEVEL_COLUMNS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12)
+LEVEL_DTYPE = np.dtype([
+    ('level_index', 'i4'), ('num_regions', 'i4'), ('label', 'U16'),
+    ('center', 'f8', (3,)), ('bbox_min', 'f8', (3,)), ('bbox_max', 'f8', (3,))
+])
+REGION_COLUMNS = (1, 2, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15)
+REGION_DTYPE = np.dtype([
+    ('region_index', 'i4'), ('level_index', 'i4'), ('label', 'U16'),
+    ('center', 'f4', (3,)), ('bbox_min', 'f4', (3,)), ('bbox_max', 'f4', (3,)), ('height', 'f4')
+])
+
+USD_EXTENSION = '.usd'
+
+# Persisted house mesh transforms, one JSON file per house
+MESH_TRANSFORM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "matterport_lighting")
+
+# -90° X rotation applied during OBJ->USD conversion: (x, y, z) -> (x, z, -y). Light positions get it
+# as the first factor of the fused affine in _build_world_affine
+MATTERPORT_ROTATION = np.array([
+    [1.0, 0.0, 0.0],
+    [0.0, 0.0, 1.0],
+    [0.0, -1.0, 0.0]
+], dtype=np.float32)
+
+# Region labels (closet, toilet) whose lights hang lower
+SMALL_ROOM_LABELS = ['c', 't']
+
+# Room types lit with cool vs. warm white; everything else gets neutral white
+COOL_WHITE_ROOMS = frozenset(('kitchen', 'bathroom', 'office'))
+WARM_WHITE_ROOMS = frozenset(('bedroom', 'living_room', 'family_room'))
+
+# Scene-wide lights added under /World/MatterportLighting: (name, light type, intensity, color, rotateXYZ)
+AMBIENT_LIGHTS = (
+    ('AmbientDome', 'DomeLight', 300.0, (0.9, 0.95, 1.0), None),  # Cool ambient
+    ('KeyLight', 'DistantLight', 1000.0, (1.0, 1.0, 0.95), (-30.0, 45.0, 0.0)),  # Overall scene illumination
+)
+
+# Prim path of the room light spec inside the template layer
+LIGHT_TEMPLATE_PATH = '/SphereLightTemplate'
+
+# Prim that holds the room lights when no house mesh prim was found
+FALLBACK_HOUSE_PRIM_PATH = '/World/House'
+
+# Group prim for the scene-wide ambient lights
+AMBIENT_GROUP_PATH = '/World/MatterportLighting'
+
+# Prim type names that can hold the converted house mesh (one string check instead of two IsA calls)
+HOUSE_PRIM_TYPES = frozenset(('Mesh', 'Xform'))
+
+# Below this many lights NumPy beats the compiled kernel (its call and thread-pool overhead dominate)
+NUMBA_MIN_POINTS = 512
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _transform_points(points, linear, translation):
+        """Apply a 3x3 linear map plus translation to (N, 3) points in one fused, parallel pass"""
+        out = np.empty_like(points)
+        for i in prange(points.shape[0]):
+            x, y, z = points[i, 0], points[i, 1], points[i, 2]
+            for j in range(3):
+                out[i, j] = linear[j, 0] * x + linear[j, 1] * y + linear[j, 2] * z + translation[j]
+        return out
+else:
+    _transform_points = None
+
 class MatterportLightingSystem:
     """Combined system for loading USD and adding Matterport-based lighting"""
     
-    def __init__(self):
+    def __init__(self, dry_run: bool = False):
         self.matterport_base_path = "/home/aaron/matterport3d/v1/scans"
         
+        # Dry run: stop after the coordinate math, without loading or authoring USD
+        self.dry_run = dry_run
+        
+        # house_name -> lighting configuration (light prim paths and properties), see light_config
+        self.light_configs = {}
+        
+        # House mesh prim of the current stage, found once by _find_house_prim
+        self._house_prim = None
+        
+        # Bounds cache kept across queries, created on first use, see _get_bbox_cache
+        self._bbox_cache = None
+        
+        # Anonymous layer with the SphereLight spec every room light is copied from
+        self._light_template = None
+        
+        # house file path -> (mtime, parsed house_data), see parse_house_file
+        self._house_data_cache = {}
+        
+        # Light plan of the last house lit, as (house_data, plan), see _build_light_plan
+        self._region_light_plan = None
+        
+        # Background worker for .house parsing that overlaps with stage loading
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        
+        # house_name -> (files, parse future) queued by prefetch_houses, consumed by process_house
+        self._prefetched = {}
+        
+        # house_name -> (source_key, mesh_transform), see get_house_mesh_transform
+        self._mesh_transform_cache = {}
+        
+        # Fused .house -> Isaac Sim affine as (cache key, matrix), see _build_world_affine
+        self._world_affine = None
+        
         # Room type mapping
         self.room_type_mapping = {
             'a': 'bathroom',
@@ -98,6 +265,44 @@ class MatterportLightingSystem:
             'other': 10000,        # Default
             'unlabeled': 8000      # Conservative
         }
+        
+        # Room-type lookup tables: region labels resolve to a room type id, which indexes the
+        # intensity and color arrays, so all lights' properties come from a few array gathers
+        room_types = list(dict.fromkeys([*self.room_type_mapping.values(), 'other']))
+        type_ids = {room_type: type_id for type_id, room_type in enumerate(room_types)}
+        self._room_types = np.array(room_types)
+        self._room_intensity_lut = np.array([self._room_type_intensity(room_type) for room_type in room_types],
+                                            dtype=np.float32)
+        self._room_color_lut = np.array([self._room_type_color(room_type) for room_type in room_types],
+                                        dtype=np.float32)
+        
+        # Labels sorted for np.searchsorted; unknown labels fall back to 'other'
+        sorted_labels = sorted(self.room_type_mapping)
+        self._sorted_labels = np.array(sorted_labels)
+        self._sorted_label_type_ids = np.array([type_ids[self.room_type_mapping[label]] for label in sorted_labels],
+                                               dtype=np.int8)
+        self._default_type_id = type_ids['other']
+    
+    def _room_type_intensity(self, room_type: str) -> float:
+        """Resolve the light intensity for a room type"""
+        
+        return float(self.room_intensities.get(room_type, 1000))
+    
+    def _room_type_color(self, room_type: str) -> tuple:
+        """Resolve the light color for a room type"""
+        
+        if room_type in COOL_WHITE_ROOMS:
+            return (1.0, 1.0, 0.95)   # Cool white
+        elif room_type in WARM_WHITE_ROOMS:
+            return (1.0, 0.95, 0.85)  # Warm white
+        return (1.0, 0.98, 0.9)       # Neutral white
+    
+    def _lookup_room_type_ids(self, labels: np.ndarray) -> np.ndarray:
+        """Map an array of region labels to room type ids in one vectorized pass"""
+        
+        idx = np.minimum(np.searchsorted(self._sorted_labels, labels), len(self._sorted_labels) - 1)
+        known = self._sorted_labels[idx] == labels
+        return np.where(known, self._sorted_label_type_ids[idx], self._default_type_id)
     
     def find_house_files(self, house_name: str) -> Dict[str, str]:
         """Find USD and .house files for a given house"""
@@ -109,234 +314,405 @@ class MatterportLightingSystem:
         
         house_dir = os.path.join(self.matterport_base_path, house_name)
         
+        # One readdir per directory; DirEntry.is_file()/is_dir() reuse its d_type instead of stat-ing
+        house_entries = self._scan_dir(house_dir)
+        
         # Find .house file
         house_seg_path = os.path.join(house_dir, "house_segmentations", house_name, "house_segmentations")
         house_file = os.path.join(house_seg_path, f"{house_name}.house")
         
-        if os.path.exists(house_file):
+        if "house_segmentations" in house_entries and os.path.exists(house_file):
             files['house_file'] = house_file
         
-        # Find USD file (check common locations)
-        usd_candidates = [
-            os.path.join(house_dir, f"{house_name}_corrected.usd"),
-            os.path.join(house_dir, f"{house_name}.usd"),
-            os.path.join(house_dir, "matterport_mesh", f"{house_name}.usd"),
-        ]
+        # Find USD file (check common locations in priority order)
+        files['usd_file'] = self._first_file(house_entries, [f"{house_name}_corrected.usd", f"{house_name}.usd"])
         
-        # Also check for any USD files in matterport_mesh subdirectories
-        mesh_dir = os.path.join(house_dir, "matterport_mesh")
-        if os.path.exists(mesh_dir):
-            for subdir in os.listdir(mesh_dir):
-                subdir_path = os.path.join(mesh_dir, subdir)
-                if os.path.isdir(subdir_path):
-                    for file in os.listdir(subdir_path):
-                        if file.endswith('.usd'):
-                            usd_candidates.append(os.path.join(subdir_path, file))
-        
-        for usd_path in usd_candidates:
-            if os.path.exists(usd_path):
-                files['usd_file'] = usd_path
-                break
+        mesh_entry = house_entries.get("matterport_mesh")
+        if files['usd_file'] is None and mesh_entry is not None and mesh_entry.is_dir():
+            mesh_entries = self._scan_dir(mesh_entry.path)
+            files['usd_file'] = self._first_file(mesh_entries, [f"{house_name}.usd"])
+            
+            # Also check for any USD files in matterport_mesh subdirectories
+            for subdir in mesh_entries.values():
+                if files['usd_file'] is not None:
+                    break
+                if subdir.is_dir():
+                    for entry in self._scan_dir(subdir.path).values():
+                        if entry.name.endswith(USD_EXTENSION) and entry.is_file():
+                            files['usd_file'] = entry.path
+                            break
         
         return files
     
+    def _scan_dir(self, path: str) -> Dict[str, os.DirEntry]:
+        """List a directory once, keyed by entry name (empty if it doesn't exist)"""
+        
+        try:
+            with os.scandir(path) as it:
+                return {entry.name: entry for entry in it}
+        except OSError:
+            return {}
+    
+    def _first_file(self, entries: Dict[str, os.DirEntry], names: List[str]):
+        """Return the path of the first name that is a file in the scanned entries"""
+        
+        for name in names:
+            entry = entries.get(name)
+            if entry is not None and entry.is_file():
+                return entry.path
+        return None
+    
     def parse_house_file(self, house_file_path: str) -> Dict:
-        """Parse .house file and extract region data"""
+        """Parse .house file and extract region data (memoized per path and modification time)"""
+        
+        # The returned dict is shared between callers and must be treated as read-only
+        mtime = os.path.getmtime(house_file_path)
+        cached = self._house_data_cache.get(house_file_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, self._load_house_data(house_file_path))
+            self._house_data_cache[house_file_path] = cached
+        return cached[1]
+    
+    def _load_house_data(self, house_file_path: str) -> Dict:
+        """Parse .house file, reusing a binary sidecar cache when up to date"""
+        
+        cache_path = f"{house_file_path}.pkl"
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(house_file_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get('version') == HOUSE_CACHE_VERSION:
+                    log.info("⚡ Loaded cached house data: %s", cache_path)
+                    return cached['house_data']
+            except Exception as e:
+                # A corrupt sidecar can fail in many ways (EOFError, ValueError, ImportError, ...);
+                # any of them just means re-parsing the .house file
+                log.warning("⚠️  Warning: Ignoring unreadable house cache %s: %s", cache_path, e)
+        
+        house_data = self._read_house_file(house_file_path)
+        
+        # Write to a temporary file and rename it into place, so an interrupted or concurrent run
+        # never leaves a truncated sidecar that looks newer than the .house file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': HOUSE_CACHE_VERSION, 'house_data': house_data}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            log.warning("⚠️  Warning: Could not write house cache %s: %s", cache_path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        
+        return house_data
+    
+    def _read_house_file(self, house_file_path: str) -> Dict:
+        """Parse the ASCII .house file, converting level/region records in bulk with NumPy"""
         
         house_data = {
             'house_name': os.path.basename(house_file_path).replace('.house', ''),
             'header': None,
             'levels': [],
-            'regions': []
+            'regions': None
         }
         
-        print(f"📖 Reading house file: {house_file_path}")
+        log.info("📖 Reading house file: %s", house_file_path)
+        
+        # Stream the file and bucket the records we need by type, so each group is converted in a
+        # single C-level pass. Everything else (surfaces, vertices, objects, ...) is dropped as it
+        # is read, so peak memory no longer includes a copy of the whole file.
+        header_lines, level_lines, region_lines = [], [], []
+        buckets = {b'H ': header_lines, b'L ': level_lines, b'R ': region_lines}
+        with open(house_file_path, 'rb') as f:
+            for line in f:
+                bucket = buckets.get(line[:2])
+                if bucket is not None:
+                    bucket.append(line)
+        
+        if header_lines:
+            parts = header_lines[0].split()
+            try:
+                if len(parts) >= 24:
+                    house_data['header'] = {
+                        'name': parts[1].decode(),
+                        'num_regions': int(parts[10]),
+                        'num_levels': int(parts[12]),
+                        'bbox_min': [float(parts[18]), float(parts[19]), float(parts[20])],
+                        'bbox_max': [float(parts[21]), float(parts[22]), float(parts[23])]
+                    }
+            except ValueError as e:
+                log.warning("⚠️  Warning: Error parsing header: %s", e)
+        
+        levels = self._load_records(level_lines, LEVEL_DTYPE, LEVEL_COLUMNS, 'level')
+        regions = self._load_records(region_lines, REGION_DTYPE, REGION_COLUMNS, 'region')
+        house_data['levels'] = self._records_to_dicts(levels)
+        # Regions are kept as structure-of-arrays: one contiguous array per field
+        house_data['regions'] = {name: np.ascontiguousarray(regions[name]) for name in REGION_DTYPE.names}
+        
+        log.info("✅ Parsed %d regions across %d levels", len(regions), len(house_data['levels']))
+        return house_data
+    
+    def _load_records(self, lines: List[bytes], dtype: np.dtype, usecols: tuple, record_type: str) -> np.ndarray:
+        """Convert same-type .house records into a structured array with one np.loadtxt call"""
         
-        with open(house_file_path, 'r') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                parts = line.split()
-                if len(parts) == 0:
-                    continue
-                    
-                line_type = parts[0]
-                
+        if not lines:
+            return np.empty(0, dtype=dtype)
+        
+        try:
+            return np.loadtxt(lines, dtype=dtype, usecols=usecols, ndmin=1)
+        except ValueError:
+            # Fall back to per-record conversion so one malformed line doesn't drop the whole group,
+            # filling a pre-sized array instead of collecting one-row arrays to concatenate
+            records = np.empty(len(lines), dtype=dtype)
+            count = 0
+            for line in lines:
                 try:
-                    if line_type == 'H':
-                        # Header line
-                        if len(parts) >= 24:
-                            house_data['header'] = {
-                                'name': parts[1],
-                                'num_regions': int(parts[10]),
-                                'num_levels': int(parts[12]),
-                                'bbox_min': [float(parts[18]), float(parts[19]), float(parts[20])],
-                                'bbox_max': [float(parts[21]), float(parts[22]), float(parts[23])]
-                            }
-                            
-                    elif line_type == 'L':
-                        # Level line
-                        if len(parts) >= 13:
-                            level_data = {
-                                'level_index': int(parts[1]),
-                                'num_regions': int(parts[2]),
-                                'label': parts[3],
-                                'center': [float(parts[4]), float(parts[5]), float(parts[6])],
-                                'bbox_min': [float(parts[7]), float(parts[8]), float(parts[9])],
-                                'bbox_max': [float(parts[10]), float(parts[11]), float(parts[12])]
-                            }
-                            house_data['levels'].append(level_data)
-                            
-                    elif line_type == 'R':
-                        # Region line
-                        if len(parts) >= 16:
-                            region_data = {
-                                'region_index': int(parts[1]),
-                                'level_index': int(parts[2]),
-                                'label': parts[5],
-                                'center': [float(parts[6]), float(parts[7]), float(parts[8])],
-                                'bbox_min': [float(parts[9]), float(parts[10]), float(parts[11])],
-                                'bbox_max': [float(parts[12]), float(parts[13]), float(parts[14])],
-                                'height': float(parts[15])
-                            }
-                            house_data['regions'].append(region_data)
-                            
-                except (ValueError, IndexError) as e:
-                    print(f"⚠️  Warning: Error parsing line {line_num}: {e}")
-                    continue
-        
-        print(f"✅ Parsed {len(house_data['regions'])} regions across {len(house_data['levels'])} levels")
-        return house_data
+                    records[count] = np.loadtxt([line], dtype=dtype, usecols=usecols, ndmin=1)[0]
+                    count += 1
+                except ValueError as e:
+                    log.warning("⚠️  Warning: Error parsing %s record '%s': %s",
+                                record_type, line[:40].decode(errors='replace'), e)
+            return records[:count]
+    
+    def _records_to_dicts(self, records: np.ndarray) -> List[Dict]:
+        """Turn a structured array into a list of per-record dicts with plain Python values"""
+        
+        fields = records.dtype.names
+        columns = [records[name].tolist() for name in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)]
     
-    def calculate_light_position(self, region: Dict) -> List[float]:
-        """Calculate optimal light position for a region"""
+    def calculate_all_light_positions(self, regions: Dict) -> np.ndarray:
+        """Calculate optimal light positions for all regions at once, as an (R, 3) array"""
         
-        # Use region center as base
-        center_x, center_y, center_z = region['center']
+        # Use region centers as base
+        centers = regions['center']
+        labels = regions['label']
         
         # Calculate floor and ceiling levels
-        floor_z = region['bbox_min'][2]
-        ceiling_z = region['bbox_max'][2]
+        floor_z = regions['bbox_min'][:, 2]
+        ceiling_z = regions['bbox_max'][:, 2]
         room_height = ceiling_z - floor_z
         
-        # Determine light height based on room type and height
-        if region['label'] == 's':  # stairs
-            light_height = floor_z + room_height * 0.4
-        elif region['label'] in ['c', 't']:  # closets, toilets
-            light_height = floor_z + min(2.2, room_height * 0.8)
-        elif room_height > 4.0:  # High ceiling rooms
-            light_height = floor_z + room_height * 0.6
-        else:  # Normal rooms
-            light_height = floor_z + min(2.7, room_height * 0.8)
+        # Determine light height based on room type and height (first matching rule wins)
+        is_stairs = labels == 's'
+        is_small = np.isin(labels, SMALL_ROOM_LABELS)  # closets, toilets
+        is_tall = room_height > 4.0  # High ceiling rooms
+        light_height = np.select(
+            [is_stairs, is_small, is_tall],
+            [floor_z + room_height * 0.4,
+             floor_z + np.minimum(2.2, room_height * 0.8),
+             floor_z + room_height * 0.6],
+            default=floor_z + np.minimum(2.7, room_height * 0.8)  # Normal rooms
+        )
         
-        return [center_x, center_y, light_height]
+        return np.stack([centers[:, 0], centers[:, 1], light_height], axis=1).astype(np.float32, copy=False)
     
     def extract_light_positions(self, house_data: Dict) -> Dict:
-        """Extract all light positions from house data"""
+        """Extract all light positions from house data
+        
+        Returns fresh light dicts on every call (the transforms mutate them), built from the
+        light plan computed once per parsed house.
+        """
+        
+        plan = self._build_light_plan(house_data)
         
         light_positions = {
             'house_name': house_data['house_name'],
             'total_lights': 0,
-            'levels': {},
+            'levels': {level_idx: {'level_name': level_name, 'lights': []}
+                       for level_idx, level_name in plan['level_names'].items()},
             'all_positions': []
         }
         
-        # Process each region
-        for region in house_data['regions']:
-            # Skip junk regions
-            if region['label'] == 'Z':
-                continue
-            
-            level_idx = region['level_index']
-            
-            # Initialize level if needed
-            if level_idx not in light_positions['levels']:
-                light_positions['levels'][level_idx] = {
-                    'level_name': f"Level_{level_idx}",
-                    'lights': []
-                }
-            
-            # Find level name
-            for level in house_data['levels']:
-                if level['level_index'] == level_idx:
-                    light_positions['levels'][level_idx]['level_name'] = level['label']
-                    break
-            
-            # Calculate light position
-            light_pos = self.calculate_light_position(region)
-            room_type = self.room_type_mapping.get(region['label'], 'other')
-            intensity = self.room_intensities.get(room_type, 1000)
-            
+        # Shared with the plan without a copy: apply_world_transform only reads it (and replaces
+        # _positions_array with a new array), and the plan keeps it read-only
+        positions = plan['positions']
+        for (region_idx, level_idx, label, room_type, intensity, color,
+             center, height, floor_z, ceiling_z), light_pos in zip(plan['rows'], positions.tolist()):
             light_info = {
-                'region_index': region['region_index'],
-                'room_label': region['label'],
+                'region_index': region_idx,
+                'room_label': label,
                 'room_type': room_type,
                 'position': light_pos,
                 'intensity': intensity,
-                'room_center': region['center'],
-                'room_height': region['height'],
-                'floor_z': region['bbox_min'][2],
-                'ceiling_z': region['bbox_max'][2]
+                'color': color,
+                'room_center': center,
+                'room_height': height,
+                'floor_z': floor_z,
+                'ceiling_z': ceiling_z
             }
             
             light_positions['levels'][level_idx]['lights'].append(light_info)
             light_positions['all_positions'].append(light_info)
-            light_positions['total_lights'] += 1
+        light_positions['total_lights'] = len(light_positions['all_positions'])
+        
+        # (N, 3) array of positions, row-aligned with all_positions, for vectorized transforms
+        light_positions['_positions_array'] = positions
         
         return light_positions
     
+    def _build_light_plan(self, house_data: Dict) -> Dict:
+        """Per-region light rows, level names and positions for a parsed house (cached on self)
+        
+        The plan only depends on house_data, so re-lighting the same house reuses it; a different
+        house (or a re-parsed, edited .house file) replaces it.
+        """
+        
+        if self._region_light_plan is not None and self._region_light_plan[0] is house_data:
+            return self._region_light_plan[1]
+        
+        # Index levels once (reversed so the first level with a given index wins)
+        level_by_index = {level['level_index']: level for level in reversed(house_data['levels'])}
+        
+        # Calculate every light position in one vectorized pass, skipping junk regions
+        regions = house_data['regions']
+        keep = regions['label'] != 'Z'
+        positions = self.calculate_all_light_positions(regions)[keep]
+        
+        # Resolve room type, intensity and color for every light with array lookups
+        type_ids = self._lookup_room_type_ids(regions['label'][keep])
+        
+        # One row per light, in region order (row-aligned with positions)
+        level_indices = regions['level_index'][keep].tolist()
+        rows = list(zip(
+            regions['region_index'][keep].tolist(), level_indices,
+            regions['label'][keep].tolist(), self._room_types[type_ids].tolist(),
+            self._room_intensity_lut[type_ids].tolist(), self._room_color_lut[type_ids].tolist(),
+            regions['center'][keep].tolist(), regions['height'][keep].tolist(),
+            regions['bbox_min'][keep, 2].tolist(), regions['bbox_max'][keep, 2].tolist()
+        ))
+        
+        # Levels in order of first appearance, named after their .house level label when known
+        level_names = {}
+        for level_idx in dict.fromkeys(level_indices):
+            level = level_by_index.get(level_idx)
+            level_names[level_idx] = level['label'] if level else f"Level_{level_idx}"
+        
+        # Handed out by every extract_light_positions call, so nothing may write into it
+        positions.flags.writeable = False
+        plan = {'level_names': level_names, 'rows': rows, 'positions': positions}
+        self._region_light_plan = (house_data, plan)
+        return plan
+    
     def load_usd_file(self, usd_file_path: str) -> bool:
         """Load USD file into Isaac Sim"""
         
-        print(f"📁 Loading USD file: {usd_file_path}")
+        log.info("📁 Loading USD file: %s", usd_file_path)
+        
+        # A new stage invalidates the cached house prim and bounds
+        self._house_prim = None
+        if self._bbox_cache is not None:
+            self._bbox_cache.Clear()
+        
+        context = omni.usd.get_context()
+        
+        # Subscribe before opening so the OPENED event can't be missed
+        stage_opened = threading.Event()
+        def on_stage_event(event):
+            if event.type == int(omni.usd.StageEventType.OPENED):
+                stage_opened.set()
+        subscription = context.get_stage_event_stream().create_subscription_to_pop(
+            on_stage_event, name="matterport_lighting_stage_opened")
         
         try:
             # Load the USD file
-            success = omni.usd.get_context().open_stage(usd_file_path)
+            success = context.open_stage(usd_file_path)
             if not success:
-                print("❌ Failed to load USD file")
+                log.error("❌ Failed to load USD file")
                 return False
             
-            stage = omni.usd.get_context().get_stage()
+            # Give it a moment to load: wait for the OPENED event rather than a fixed delay
+            if not self._wait_for_stage(stage_opened):
+                log.warning("⚠️  Timed out waiting for stage to finish opening")
+            
+            stage = context.get_stage()
             if not stage:
-                print("❌ No stage available after loading")
+                log.error("❌ No stage available after loading")
                 return False
             
-            print("✅ USD file loaded successfully")
-            
-            # Give it a moment to load
-            time.sleep(2)
+            log.info("✅ USD file loaded successfully")
             return True
             
         except Exception as e:
-            print(f"❌ Error loading USD file: {e}")
+            log.error("❌ Error loading USD file: %s", e)
             return False
+        
+        finally:
+            subscription.unsubscribe()
     
-    def get_house_mesh_transform(self) -> Dict:
-        """Get the transform of the loaded house mesh"""
+    def _wait_for_stage(self, stage_opened: threading.Event, timeout: float = 10.0) -> bool:
+        """Wait for the stage OPENED event, or until the timeout expires
+        
+        Stage events are dispatched from app updates on this thread, so the app keeps
+        updating instead of blocking on the event.
+        """
+        
+        # open_stage usually completes synchronously; then there is nothing to wait for
+        if omni.usd.get_context().get_stage_state() == omni.usd.StageState.OPENED:
+            return True
+        
+        deadline = time.monotonic() + timeout
+        while not stage_opened.is_set():
+            if time.monotonic() > deadline:
+                return False
+            simulation_app.update()
+        return True
+    
+    def _find_house_prim(self):
+        """Find the house mesh prim with a single stage traversal and cache it"""
+        
+        if self._house_prim is not None and self._house_prim.IsValid():
+            return self._house_prim
         
         stage = omni.usd.get_context().get_stage()
+        self._house_prim = None
+        
+        world_path = Sdf.Path('/World')
+        prim_iter = iter(Usd.PrimRange.Stage(stage, Usd.TraverseInstanceProxies()))
+        for prim in prim_iter:
+            # Compare SdfPaths directly; no per-prim path string is built
+            path = prim.GetPath()
+            # Nothing under a lighting prim or outside /World can be the house: skip whole subtrees.
+            # Since those subtrees are pruned, checking the prim's own name for 'light' is enough
+            if 'light' in prim.GetName().lower() or not path.HasPrefix(world_path):
+                prim_iter.PruneChildren()
+                continue
+            # The first Mesh/Xform under the /World wrapper is the house
+            if path != world_path and prim.GetTypeName() in HOUSE_PRIM_TYPES:
+                self._house_prim = prim
+                break
         
-        # Find the house mesh prim (look for common mesh locations)
-        house_prim = None
+        return self._house_prim
+    
+    def get_house_mesh_transform(self, house_name: str = None, usd_file: str = None) -> Dict:
+        """Get the transform of the loaded house mesh (cached per house in memory and on disk)"""
+        
+        # The transform only depends on the USD file, so it is keyed on its path and mtime
+        source_key = None
+        if house_name and usd_file and os.path.exists(usd_file):
+            source_key = [usd_file, os.path.getmtime(usd_file)]
+            cached = self._mesh_transform_cache.get(house_name)
+            if cached is None or cached[0] != source_key:
+                cached = self._load_mesh_transform(house_name, source_key)
+            if cached is not None:
+                self._mesh_transform_cache[house_name] = cached
+                log.info("⚡ Using cached house mesh transform: %s", cached[1]['prim_path'])
+                return cached[1]
+        
+        # Without a stage, a persisted transform is the only source of the mesh bounds
+        if self.dry_run:
+            log.warning("⚠️  Dry run: no cached mesh transform for %s - light positions stay in raw .house "
+                        "coordinates", house_name)
+            return None
+        
+        # Find the house mesh prim (shared, cached traversal)
+        house_prim = self._find_house_prim()
         mesh_transform = None
+        bbox_computed = False
         
-        # Search for mesh prims in the stage
-        mesh_candidates = []
-        for prim in stage.Traverse():
-            prim_path = str(prim.GetPath())
-            if prim.IsA(UsdGeom.Mesh) or prim.IsA(UsdGeom.Xform):
-                # Skip lighting prims
-                if "lighting" not in prim_path.lower() and "light" not in prim_path.lower():
-                    mesh_candidates.append(prim)
-        
-        if mesh_candidates:
-            # print(f"{mesh_candidates} Mesh candidates found")
-            # Use the first significant mesh found
-            house_prim = mesh_candidates[1]  # The first one is a XForm that wraps the whole house, not the actual mesh
-            
+        if house_prim:
             # Get transform matrix
             if house_prim.IsA(UsdGeom.Xformable):
                 xformable = UsdGeom.Xformable(house_prim)
@@ -347,44 +723,113 @@ class MatterportLightingSystem:
             
             # Get bounding box with proper USD API
             try:
-                # Create BBoxCache with required parameters
-                time_code = Usd.TimeCode.Default()
-                purposes = [UsdGeom.Tokens.default_]
-                bbox_cache = UsdGeom.BBoxCache(time_code, purposes)
-                
-                bbox = bbox_cache.ComputeWorldBound(house_prim)
+                bbox = self._get_bbox_cache().ComputeWorldBound(house_prim)
+                # Untransformed range, i.e. in the house prim's own frame, which is where the lights
+                # are authored (as its children); the center comes from the same range
                 bbox_range = bbox.GetRange()
                 
                 mesh_transform = {
                     'prim_path': str(house_prim.GetPath()),
                     'transform_matrix': transform_matrix,
-                    'center': bbox.ComputeCentroid(),
+                    'center': np.asarray(bbox_range.GetMidpoint(), dtype=np.float32),
                     'bbox_min': bbox_range.GetMin(),
                     'bbox_max': bbox_range.GetMax(),
                     'size': bbox_range.GetSize()
                 }
+                bbox_computed = True
                 
             except Exception as bbox_error:
-                print(f"⚠️  Could not compute bounding box: {bbox_error}")
+                log.warning("⚠️  Could not compute bounding box: %s", bbox_error)
                 # Fallback: just use transform without bbox
                 mesh_transform = {
                     'prim_path': str(house_prim.GetPath()),
                     'transform_matrix': transform_matrix,
-                    'center': Gf.Vec3d(0, 0, 0),
+                    'center': np.zeros(3, dtype=np.float32),
                     'bbox_min': Gf.Vec3d(-10, -10, -1),
                     'bbox_max': Gf.Vec3d(10, 10, 5),
                     'size': Gf.Vec3d(20, 20, 6)
                 }
             
-            print(f"🏠 Found house mesh: {mesh_transform['prim_path']}")
-            print(f"📏 House bounding box:")
-            print(f"   Min: ({mesh_transform['bbox_min'][0]:.1f}, {mesh_transform['bbox_min'][1]:.1f}, {mesh_transform['bbox_min'][2]:.1f})")
-            print(f"   Max: ({mesh_transform['bbox_max'][0]:.1f}, {mesh_transform['bbox_max'][1]:.1f}, {mesh_transform['bbox_max'][2]:.1f})")
-            print(f"   Center: ({mesh_transform['center'][0]:.1f}, {mesh_transform['center'][1]:.1f}, {mesh_transform['center'][2]:.1f})")
+            bbox_min, bbox_max, center = mesh_transform['bbox_min'], mesh_transform['bbox_max'], mesh_transform['center']
+            log.info("🏠 Found house mesh: %s\n"
+                     "📏 House bounding box:\n"
+                     "   Min: (%.1f, %.1f, %.1f)\n"
+                     "   Max: (%.1f, %.1f, %.1f)\n"
+                     "   Center: (%.1f, %.1f, %.1f)",
+                     mesh_transform['prim_path'], *bbox_min, *bbox_max, *center)
+        
+        # Only real measurements are cached, never the fallback bounds
+        if source_key and bbox_computed:
+            self._mesh_transform_cache[house_name] = (source_key, mesh_transform)
+            self._save_mesh_transform(house_name, source_key, mesh_transform)
         
         return mesh_transform
     
-    def scale_light_positions(self, light_positions: Dict, mesh_transform: Dict, house_header: Dict) -> Dict:
+    def _get_bbox_cache(self):
+        """Bounds cache shared by all queries on the current stage, created on first use"""
+        
+        if self._bbox_cache is None:
+            # Authored extentsHint (when present) skips walking mesh points
+            self._bbox_cache = UsdGeom.BBoxCache(Usd.TimeCode.Default(), [UsdGeom.Tokens.default_],
+                                                 useExtentsHint=True)
+        return self._bbox_cache
+    
+    def _mesh_transform_cache_path(self, house_name: str) -> str:
+        """Location of the persisted mesh transform for a house"""
+        
+        return os.path.join(MESH_TRANSFORM_CACHE_DIR, f"{house_name}.json")
+    
+    def _load_mesh_transform(self, house_name: str, source_key: list):
+        """Load a persisted mesh transform as (source_key, mesh_transform) if it matches the USD file"""
+        
+        cache_path = self._mesh_transform_cache_path(house_name)
+        if not os.path.exists(cache_path):
+            return None
+        
+        try:
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data['source'] != source_key:
+                return None
+            
+            mesh_transform = {
+                'prim_path': data['prim_path'],
+                'transform_matrix': np.array(data['transform_matrix']),
+                'center': np.asarray(data['center'], dtype=np.float32),
+                'bbox_min': np.array(data['bbox_min']),
+                'bbox_max': np.array(data['bbox_max']),
+                'size': np.array(data['size'])
+            }
+            return source_key, mesh_transform
+        
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning("⚠️  Warning: Ignoring unreadable mesh transform cache %s: %s", cache_path, e)
+            return None
+    
+    def _save_mesh_transform(self, house_name: str, source_key: list, mesh_transform: Dict):
+        """Persist a mesh transform so later runs can skip the stage traversal and bounds computation"""
+        
+        cache_path = self._mesh_transform_cache_path(house_name)
+        data = {
+            'source': source_key,
+            'prim_path': mesh_transform['prim_path'],
+            'transform_matrix': [list(row) for row in mesh_transform['transform_matrix']],
+            'center': np.asarray(mesh_transform['center']).tolist(),
+            'bbox_min': list(mesh_transform['bbox_min']),
+            'bbox_max': list(mesh_transform['bbox_max']),
+            'size': list(mesh_transform['size'])
+        }
+        
+        try:
+            os.makedirs(MESH_TRANSFORM_CACHE_DIR, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            log.warning("⚠️  Warning: Could not write mesh transform cache %s: %s", cache_path, e)
+    
+    def _house_to_isaac_mapping(self, mesh_transform: Dict, house_header: Dict) -> tuple:
+        """Rotated house center, per-axis scale and Isaac Sim center relating .house bounds to the mesh"""
+        
         # House file bounds and center (original coordinates)
         house_min = house_header['bbox_min']  # [x_min, y_min, z_min]
         house_max = house_header['bbox_max']  # [x_max, y_max, z_max]
@@ -423,80 +868,71 @@ class MatterportLightingSystem:
             house_max[1] - house_min[1]   # z size from original y
         )
         isaac_size = (isaac_max[0] - isaac_min[0], isaac_max[1] - isaac_min[1], isaac_max[2] - isaac_min[2])
-        scale_factors = (isaac_size[0] / rotated_house_size[0], isaac_size[1] / rotated_house_size[1], isaac_size[2] / rotated_house_size[2])
-
-        transformed_positions = light_positions.copy()
-        # Transform each light position in levels: 90° X rotation (x, y, z) -> (x, -z, y)
-        for level_idx, level_data in transformed_positions['levels'].items():
-            for light_info in level_data['lights']:
-                original_pos = light_info['position']
-
-                rel_x = original_pos[0] - rotated_house_center[0]
-                rel_y = original_pos[1] - rotated_house_center[1] 
-                rel_z = original_pos[2] - rotated_house_center[2]
-                
-                # Step 3: Scale
-                scaled_x = rel_x * scale_factors[0]
-                scaled_y = rel_y * scale_factors[1]
-                scaled_z = rel_z * scale_factors[2]
-                
-                # Step 4: Translate to Isaac Sim center
-                isaac_x = scaled_x + isaac_center[0]
-                isaac_y = scaled_y + isaac_center[1]
-                isaac_z = scaled_z + isaac_center[2]
-
-                transformed_pos = [isaac_x, isaac_y, isaac_z]
-                # Update light position
-                light_info['position'] = transformed_pos
+        scale = np.array(isaac_size) / np.array(rotated_house_size)
+        
+        # Light placement only needs float32 precision (positions are reported to 0.1 m)
+        return (np.asarray(rotated_house_center, dtype=np.float32), scale.astype(np.float32, copy=False),
+                np.asarray(isaac_center, dtype=np.float32))
+    
+    def _build_world_affine(self, mesh_transform: Dict, house_header: Dict) -> np.ndarray:
+        """Compose Matterport rotation, scale and translation into one 4x4 affine matrix
+        
+        M = T(isaac_center) @ S(scale) @ T(-rotated_house_center) @ R_x(-90°)
+        
+        The matrix only depends on the house and mesh bounds, so it is cached on self and
+        reused until either changes.
+        """
         
-        # Rebuild all_positions from the already transformed levels data
-        transformed_positions['all_positions'] = []
-        for level_data in transformed_positions['levels'].values():
-            transformed_positions['all_positions'].extend(level_data['lights'])
+        cache_key = (tuple(house_header['bbox_min']), tuple(house_header['bbox_max']),
+                     tuple(mesh_transform['bbox_min']), tuple(mesh_transform['bbox_max']))
+        if self._world_affine is not None and self._world_affine[0] == cache_key:
+            return self._world_affine[1]
         
-        return transformed_positions #(isaac_x, isaac_y, isaac_z)
+        rotated_house_center, scale, isaac_center = self._house_to_isaac_mapping(mesh_transform, house_header)
         
+        rotation = np.eye(4)
+        rotation[:3, :3] = MATTERPORT_ROTATION
+        to_house_center = np.eye(4)
+        to_house_center[:3, 3] = -rotated_house_center
+        scaling = np.diag([scale[0], scale[1], scale[2], 1.0])
+        to_isaac_center = np.eye(4)
+        to_isaac_center[:3, 3] = isaac_center
+        
+        world_affine = (to_isaac_center @ scaling @ to_house_center @ rotation).astype(np.float32)
+        self._world_affine = (cache_key, world_affine)
+        return world_affine
     
-    def transform_light_positions(self, light_positions: Dict, mesh_transform: Dict) -> Dict:
-        """Transform light positions to match house mesh coordinate system"""
+    def apply_world_transform(self, light_positions: Dict, mesh_transform: Dict, house_header: Dict) -> Dict:
+        """Rotate, scale and translate .house light positions onto the Isaac Sim mesh in one pass
         
-        # if not mesh_transform:
-        #     print("⚠️  No mesh transform found - applying standard 90° X rotation for Matterport houses")
-        #     # Apply standard Matterport house rotation: 90° around Z-axis
-        #     return self.apply_matterport_rotation(light_positions)
+        Mutates light_positions in place and returns it.
+        """
         
-        # print("🔄 Transforming light positions to match house mesh...")
+        world_affine = self._build_world_affine(mesh_transform, house_header)
         
-        # # For Matterport houses, we typically need a 90° X rotation
-        # # Based on the house transform showing 90° rotation
-        transformed_positions = self.apply_matterport_rotation(light_positions)
+        # The affine has no projective part (bottom row is [0, 0, 0, 1]), so skip homogeneous
+        # coordinates: apply the 3x3 linear block, then the translation
+        linear = world_affine[:3, :3]
+        translation = world_affine[:3, 3]
         
-        print("✅ Light positions transformed with Matterport -90° X rotation")
-        return transformed_positions
-
-    def apply_matterport_rotation(self, light_positions: Dict) -> Dict:
-        """Apply standard Matterport house 90° X rotation to light positions"""
-        transformed_positions = light_positions.copy()
+        original = light_positions['_positions_array'].astype(np.float32, copy=False)
+        if _transform_points is not None and len(original) > NUMBA_MIN_POINTS:
+            # Compiled kernel for dense houses: one pass over the points, no temporaries. Numba
+            # compiles it (or loads it from its on-disk cache) on this first call, so typical houses
+            # below the threshold never pay for the JIT
+            transformed = _transform_points(np.ascontiguousarray(original), linear, translation)
+        else:
+            transformed = original @ linear.T
+            np.add(transformed, translation, out=transformed)
         
-        # Transform each light position in levels: 90° X rotation (x, y, z) -> (x, -z, y)
-        for level_idx, level_data in transformed_positions['levels'].items():
-            for light_info in level_data['lights']:
-                original_pos = light_info['position']
-                # 90° counterclockwise rotation around X-axis
-                new_x = original_pos[0]
-                new_y = original_pos[2]
-                new_z = -original_pos[1]
-                transformed_pos = [new_x, new_y, new_z]
-                # Update light position
-                light_info['position'] = transformed_pos
-                light_info['original_position'] = original_pos
-        
-        # Rebuild all_positions from the already transformed levels data
-        transformed_positions['all_positions'] = []
-        for level_data in transformed_positions['levels'].values():
-            transformed_positions['all_positions'].extend(level_data['lights'])
-        
-        return transformed_positions
+        # Write back into the shared light_info dicts (levels and all_positions reference the same dicts)
+        for light_info, original_pos, transformed_pos in zip(light_positions['all_positions'],
+                                                             original.tolist(), transformed.tolist()):
+            light_info['position'] = transformed_pos
+            light_info['original_position'] = original_pos
+        light_positions['_positions_array'] = transformed
+        
+        return light_positions
     
     # def apply_manual_offset(self, light_positions: Dict, offset: List[float]) -> Dict:
     #     """Apply a simple manual offset to all light positions"""
@@ -535,271 +971,505 @@ class MatterportLightingSystem:
     #     print("✅ Applied manual offset to all light positions")
     #     return transformed_positions
     
-    def create_matterport_lights(self, light_positions: Dict, mesh_transform: Dict = None) -> int:
-        """Create lights in Isaac Sim based on Matterport room data"""
+    def create_matterport_lights(self, light_positions: Dict, mesh_transform: Dict, layer=None) -> int:
+        """Create lights in Isaac Sim based on Matterport room data
         
-        stage = omni.usd.get_context().get_stage()
-        total_lights = 0
-        
-        # Find the house mesh prim to put lights inside it
-        house_prim_path = None
-        for prim in stage.Traverse():
-            prim_path = str(prim.GetPath())
-            if prim.IsA(UsdGeom.Mesh) or prim.IsA(UsdGeom.Xform):
-                # Skip lighting prims and find the main house mesh
-                if ("lighting" not in prim_path.lower() and 
-                    "light" not in prim_path.lower() and
-                    "/World/" in prim_path and
-                    prim_path != "/World"):
-                    house_prim_path = prim_path
-                    break
+        Lights are authored into `layer`, or into the stage's edit target layer if none is given.
+        """
         
-        if not house_prim_path:
-            house_prim_path = "/World/House"  # Fallback
+        # Put lights inside the house mesh prim already found by get_house_mesh_transform
+        house_prim_path = mesh_transform['prim_path'] if mesh_transform else FALLBACK_HOUSE_PRIM_PATH
 
-        print(house_prim_path + "Check")
+        log.debug("House prim for lights: %s", house_prim_path)
         
         # Create lighting group INSIDE the house mesh
-        lights_path = f"{house_prim_path}/MatterportLighting"
-        if not stage.GetPrimAtPath(lights_path):
-            UsdGeom.Xform.Define(stage, lights_path)
+        lights_path = Sdf.Path(house_prim_path).AppendChild("MatterportLighting")
+        if layer is None:
+            layer = omni.usd.get_context().get_stage().GetEditTarget().GetLayer()
         
-        print(f"💡 Creating {light_positions['total_lights']} room-based lights inside {house_prim_path}...")
+        log.info("💡 Creating %d room-based lights inside %s...", light_positions['total_lights'], house_prim_path)
         
-        # Process each level
+        # Resolve every target path up front so the authoring pass below is one tight batch.
+        # The fallback house prim doesn't exist yet, so it is defined too (an implicit `over` would
+        # leave the lights undefined)
+        group_paths = [lights_path] if mesh_transform else [lights_path.GetParentPath(), lights_path]
+        light_paths = []
         for level_idx, level_data in light_positions['levels'].items():
             level_name = level_data['level_name']
-            level_lights_path = f"{lights_path}/Level_{level_idx}"
-            
-            if not stage.GetPrimAtPath(level_lights_path):
-                UsdGeom.Xform.Define(stage, level_lights_path)
+            level_lights_path = lights_path.AppendChild(f"Level_{level_idx}")
+            group_paths.append(level_lights_path)
             
-            print(f"  🏠 Level {level_idx} ({level_name}): {len(level_data['lights'])} rooms")
+            log.info("  🏠 Level %s (%s): %d rooms", level_idx, level_name, len(level_data['lights']))
             
-            # Create lights for each room
+            # One light per room, positioned relative to house
+            # Structural append on the SdfPath; no full-path string to build and re-parse
             for light_info in level_data['lights']:
+                light_paths.append((level_lights_path.AppendChild(self._light_prim_name(light_info)), light_info))
+        
+        # Author prim specs inside one change block. process_house passes a detached scratch layer no
+        # stage listens to (the stage recomposes once, in _commit_lights_layer); only when authoring
+        # straight into the edit target does this block batch the stage's notices
+        created = []
+        with Sdf.ChangeBlock():
+            for group_path in group_paths:
+                self._define_xform_spec(layer, group_path)
+            
+            for light_path, light_info in light_paths:
                 try:
-                    region_idx = light_info['region_index']
-                    room_type = light_info['room_type']
-                    position = light_info['position']
-                    intensity = light_info['intensity']
-                    
-                    # Create light
-                    light_path = f"{level_lights_path}/{room_type}_{region_idx:03d}"
-                    light_prim = UsdLux.SphereLight.Define(stage, light_path)
-                    
-                    # Set light properties
-                    light_prim.CreateIntensityAttr(float(intensity))
-                    light_prim.CreateRadiusAttr(0.1)
-                    
-                    # Color based on room type
-                    if room_type in ['kitchen', 'bathroom', 'office']:
-                        color = Gf.Vec3f(1.0, 1.0, 0.95)  # Cool white
-                    elif room_type in ['bedroom', 'living_room', 'family_room']:
-                        color = Gf.Vec3f(1.0, 0.95, 0.85)  # Warm white
-                    else:
-                        color = Gf.Vec3f(1.0, 0.98, 0.9)   # Neutral white
-                    
-                    light_prim.CreateColorAttr(color)
-                    
-                    # Position the light (now relative to house)
-                    xform = UsdGeom.Xformable(light_prim)
-                    translate_op = xform.AddTranslateOp()
-                    translate_op.Set(Gf.Vec3d(position[0], position[1], position[2]))
-                    
-                    total_lights += 1
-                    
-                    if total_lights <= 5:  # Show details for first few lights
-                        if 'original_position' in light_info:
-                            orig = light_info['original_position']
-                            print(f"    ✨ {room_type:12} -> ({position[0]:6.1f}, {position[1]:6.1f}, {position[2]:6.1f}) [was ({orig[0]:6.1f}, {orig[1]:6.1f}, {orig[2]:6.1f})] [{intensity} lumens]")
-                        else:
-                            print(f"    ✨ {room_type:12} -> ({position[0]:6.1f}, {position[1]:6.1f}, {position[2]:6.1f}) [{intensity} lumens]")
-                    
+                    self._define_sphere_light_spec(layer, light_path, light_info['intensity'],
+                                                   light_info['color'], light_info['position'])
+                    created.append(light_info)
                 except Exception as e:
-                    print(f"    ❌ Failed to create light for region {region_idx}: {e}")
+                    log.error("    ❌ Failed to create light for region %s: %s", light_info['region_index'], e)
+        total_lights = len(created)
+        
+        # Show details for first few lights (--verbose)
+        for light_info in created[:5]:
+            room_type = light_info['room_type']
+            position = light_info['position']
+            intensity = light_info['intensity']
+            if 'original_position' in light_info:
+                log.debug("    ✨ %-12s -> (%6.1f, %6.1f, %6.1f) [was (%6.1f, %6.1f, %6.1f)] [%.0f lumens]",
+                          room_type, *position, *light_info['original_position'], intensity)
+            else:
+                log.debug("    ✨ %-12s -> (%6.1f, %6.1f, %6.1f) [%.0f lumens]", room_type, *position, intensity)
         
-        print(f"✅ Created {total_lights} lights total inside house at {house_prim_path}")
+        log.info("✅ Created %d lights total inside house at %s", total_lights, house_prim_path)
         return total_lights
     
-    def add_ambient_lighting(self) -> int:
-        """Add ambient and fill lighting"""
+    def _light_prim_name(self, light_info: Dict) -> str:
+        """Prim name of a room light, unique within its level"""
         
-        stage = omni.usd.get_context().get_stage()
+        return f"{light_info['room_type']}_{light_info['region_index']:03d}"
+    
+    def _define_prim_spec(self, layer, path: Sdf.Path, type_name: str):
+        """Author a `def <type_name>` prim spec directly in the layer"""
+        
+        prim_spec = Sdf.CreatePrimInLayer(layer, path)
+        prim_spec.specifier = Sdf.SpecifierDef
+        prim_spec.typeName = type_name
+        return prim_spec
+    
+    def _define_xform_spec(self, layer, path: Sdf.Path):
+        """Author a `def Xform` prim spec directly in the layer"""
+        
+        prim_spec = Sdf.CreatePrimInLayer(layer, path)
+        prim_spec.specifier = Sdf.SpecifierDef
+        if not prim_spec.typeName:
+            prim_spec.typeName = 'Xform'
+        return prim_spec
+    
+    def _sphere_light_template(self):
+        """Scratch layer holding a fully authored SphereLight spec to stamp lights from"""
+        
+        if self._light_template is None:
+            template = Sdf.Layer.CreateAnonymous("sphere_light_template")
+            prim_spec = Sdf.CreatePrimInLayer(template, LIGHT_TEMPLATE_PATH)
+            prim_spec.specifier = Sdf.SpecifierDef
+            prim_spec.typeName = 'SphereLight'
+            
+            self._set_attr_spec(prim_spec, 'inputs:intensity', Sdf.ValueTypeNames.Float, 0.0)
+            self._set_attr_spec(prim_spec, 'inputs:radius', Sdf.ValueTypeNames.Float, 0.1)
+            self._set_attr_spec(prim_spec, 'inputs:color', Sdf.ValueTypeNames.Color3f, Gf.Vec3f(1.0, 1.0, 1.0))
+            # Lights are only ever positioned, so a single translate op is the whole xform stack: one
+            # attribute per light, cheaper to author and to evaluate than a 4x4 xformOp:transform
+            self._set_attr_spec(prim_spec, 'xformOp:translate', Sdf.ValueTypeNames.Double3, Gf.Vec3d(0, 0, 0))
+            self._set_attr_spec(prim_spec, 'xformOpOrder', Sdf.ValueTypeNames.TokenArray,
+                                ['xformOp:translate'], Sdf.VariabilityUniform)
+            self._light_template = template
+        
+        return self._light_template
+    
+    def _define_sphere_light_spec(self, layer, path: Sdf.Path, intensity: float, color, position: List[float]):
+        """Copy the SphereLight template spec into the layer and patch its per-light values"""
+        
+        # CreatePrimInLayer makes sure the parent specs exist for CopySpec
+        Sdf.CreatePrimInLayer(layer, path)
+        Sdf.CopySpec(self._sphere_light_template(), LIGHT_TEMPLATE_PATH, layer, path)
+        
+        prim_spec = layer.GetPrimAtPath(path)
+        attributes = prim_spec.attributes
+        attributes['inputs:intensity'].default = float(intensity)
+        attributes['inputs:color'].default = Gf.Vec3f(color[0], color[1], color[2])
+        attributes['xformOp:translate'].default = Gf.Vec3d(position[0], position[1], position[2])
+        return prim_spec
+    
+    def _set_attr_spec(self, prim_spec, name: str, type_name, value, variability=None):
+        """Create (or reuse) an attribute spec on a prim spec and set its default value (varying by default)"""
+        
+        if name in prim_spec.attributes:
+            attr_spec = prim_spec.attributes[name]
+        else:
+            if variability is None:
+                variability = Sdf.VariabilityVarying
+            attr_spec = Sdf.AttributeSpec(prim_spec, name, type_name, variability)
+        attr_spec.default = value
+        return attr_spec
+    
+    def add_ambient_lighting(self, layer=None) -> int:
+        """Add ambient and fill lighting (into `layer`, or the stage's edit target layer)"""
+        
+        if layer is None:
+            layer = omni.usd.get_context().get_stage().GetEditTarget().GetLayer()
         lights_added = 0
         
         try:
-            # Add dome light for ambient illumination
-            dome_path = "/World/MatterportLighting/AmbientDome"
-            dome_prim = UsdLux.DomeLight.Define(stage, dome_path)
-            dome_prim.CreateIntensityAttr(300.0)
-            dome_prim.CreateColorAttr(Gf.Vec3f(0.9, 0.95, 1.0))  # Cool ambient
-            lights_added += 1
+            group_path = Sdf.Path(AMBIENT_GROUP_PATH)
             
-            # Add key light for overall scene illumination
-            key_path = "/World/MatterportLighting/KeyLight"
-            key_prim = UsdLux.DistantLight.Define(stage, key_path)
-            key_prim.CreateIntensityAttr(1000.0)
-            key_prim.CreateColorAttr(Gf.Vec3f(1.0, 1.0, 0.95))
-            
-            # Angle the key light
-            xform = UsdGeom.Xformable(key_prim)
-            rotate_op = xform.AddRotateXYZOp()
-            rotate_op.Set(Gf.Vec3f(-30, 45, 0))
-            lights_added += 1
+            # Authored as Sdf specs like the room lights (batched like theirs when writing to the edit target)
+            with Sdf.ChangeBlock():
+                self._define_xform_spec(layer, group_path)
+                
+                for name, light_type, intensity, color, rotation in AMBIENT_LIGHTS:
+                    light_spec = self._define_prim_spec(layer, group_path.AppendChild(name), light_type)
+                    self._set_attr_spec(light_spec, 'inputs:intensity', Sdf.ValueTypeNames.Float, intensity)
+                    self._set_attr_spec(light_spec, 'inputs:color', Sdf.ValueTypeNames.Color3f, Gf.Vec3f(*color))
+                    
+                    # Angle directional lights
+                    if rotation is not None:
+                        self._set_attr_spec(light_spec, 'xformOp:rotateXYZ', Sdf.ValueTypeNames.Float3,
+                                            Gf.Vec3f(*rotation))
+                        self._set_attr_spec(light_spec, 'xformOpOrder', Sdf.ValueTypeNames.TokenArray,
+                                            ['xformOp:rotateXYZ'], Sdf.VariabilityUniform)
+                    lights_added += 1
             
-            print(f"✅ Added {lights_added} ambient lights")
+            log.info("✅ Added %d ambient lights", lights_added)
             
         except Exception as e:
-            print(f"❌ Failed to add ambient lighting: {e}")
+            log.error("❌ Failed to add ambient lighting: %s", e)
         
         return lights_added
     
-    def process_house(self, house_name: str, custom_usd_path: str = None) -> bool:
+    def light_config(self, light_positions: Dict, mesh_transform: Dict) -> Dict:
+        """Lighting configuration for a house: every light prim path with the properties authored on it
+        
+        Mirrors what create_matterport_lights and add_ambient_lighting author, so a dry run can report
+        (and --save_config can store) the result without a stage.
+        """
+        
+        house_prim_path = mesh_transform['prim_path'] if mesh_transform else FALLBACK_HOUSE_PRIM_PATH
+        lights_path = f"{house_prim_path}/MatterportLighting"
+        
+        # Intensity and color come from the same Python values the float32 lookup tables are built
+        # from, so the saved config reads e.g. 0.9 rather than its float32 round-trip 0.8999999761581421
+        room_lights = []
+        if light_positions:
+            for level_idx, level_data in light_positions['levels'].items():
+                for light_info in level_data['lights']:
+                    room_lights.append({
+                        'prim_path': f"{lights_path}/Level_{level_idx}/{self._light_prim_name(light_info)}",
+                        'region_index': light_info['region_index'],
+                        'room_label': light_info['room_label'],
+                        'room_type': light_info['room_type'],
+                        'position': light_info['position'],
+                        'intensity': self._room_type_intensity(light_info['room_type']),
+                        'color': list(self._room_type_color(light_info['room_type']))
+                    })
+        
+        ambient_lights = [
+            {'prim_path': f"{AMBIENT_GROUP_PATH}/{name}", 'type': light_type, 'intensity': intensity,
+             'color': list(color), 'rotation': list(rotation) if rotation is not None else None}
+            for name, light_type, intensity, color, rotation in AMBIENT_LIGHTS
+        ]
+        
+        return {
+            'house_prim_path': house_prim_path,
+            'transformed': mesh_transform is not None,
+            'room_lights': room_lights,
+            'ambient_lights': ambient_lights
+        }
+    
+    def resolve_house_files(self, house_name: str, custom_usd_path: str = None) -> Dict[str, str]:
+        """Find the USD and .house files for a house, honoring a custom USD file name"""
+        
+        if not custom_usd_path:
+            return self.find_house_files(house_name)
+        
+        self.mesh_name = custom_usd_path.split('.')[0]
+        full_usd_path = os.path.join(self.matterport_base_path, house_name, "matterport_mesh", 
+                                     house_name, "matterport_mesh", custom_usd_path)
+        files = {'usd_file': full_usd_path, 'house_file': None}
+        # Still try to find .house file
+        house_dir = os.path.join(self.matterport_base_path, house_name)
+        house_seg_path = os.path.join(house_dir, "house_segmentations", house_name, "house_segmentations")
+        house_file = os.path.join(house_seg_path, f"{house_name}.house")
+        if os.path.exists(house_file):
+            files['house_file'] = house_file
+        return files
+    
+    def prefetch_houses(self, house_names: List[str], custom_usd_path: str = None):
+        """Resolve files and queue .house parsing for houses that will be processed later
+        
+        The parses run in order on the background worker, so while one stage is loading and being
+        lit the next houses' records are already being read.
+        """
+        
+        for house_name in house_names:
+            if house_name in self._prefetched:
+                continue
+            files = self.resolve_house_files(house_name, custom_usd_path)
+            future = self._executor.submit(self.parse_house_file, files['house_file']) if files['house_file'] else None
+            self._prefetched[house_name] = (files, future)
+    
+    def process_house(self, house_name: str, custom_usd_path: str = None, save_usd: bool = False) -> bool:
         """Complete processing pipeline for a house"""
         
-        print(f"🏠 Processing house: {house_name}")
-        print("=" * 60)
-        
-        # Find files
-        if custom_usd_path:
-            self.mesh_name = custom_usd_path.split('.')[0]
-            full_usd_path = os.path.join(self.matterport_base_path, house_name, "matterport_mesh", 
-                                         house_name, "matterport_mesh", custom_usd_path)
-            files = {'usd_file': full_usd_path, 'house_file': None}
-            # Still try to find .house file
-            house_dir = os.path.join(self.matterport_base_path, house_name)
-            house_seg_path = os.path.join(house_dir, "house_segmentations", house_name, "house_segmentations")
-            house_file = os.path.join(house_seg_path, f"{house_name}.house")
-            if os.path.exists(house_file):
-                files['house_file'] = house_file
-        else:
-            files = self.find_house_files(house_name)
+        log.info("🏠 Processing house: %s\n%s", house_name, "=" * 60)
+        
+        # Find files (and the parse already queued for them, if the house was prefetched)
+        files, house_future = self._prefetched.pop(house_name, (None, None))
+        if files is None:
+            files = self.resolve_house_files(house_name, custom_usd_path)
         
-        print(f"📁 USD file: {files['usd_file']}")
-        print(f"📖 House file: {files['house_file']}")
+        log.info("📁 USD file: %s\n📖 House file: %s", files['usd_file'], files['house_file'])
         
-        # Load USD file
-        if not files['usd_file']:
-            print("❌ No USD file found")
+        # Load USD file (a dry run doesn't load it, but still validates that it exists)
+        if not files['usd_file'] or (self.dry_run and not os.path.isfile(files['usd_file'])):
+            log.error("❌ No USD file found")
             return False
         
+        # Parse the .house file on a worker thread while the stage loads (the two are independent)
+        if house_future is None and files['house_file']:
+            house_future = self._executor.submit(self.parse_house_file, files['house_file'])
+        
+        if self.dry_run:
+            return self._dry_run_house(house_name, files, house_future)
+        
         if not self.load_usd_file(files['usd_file']):
             return False
         
+        # Author every light into a detached anonymous scratch layer: the stage doesn't see any of the
+        # edits until the finished groups are copied into the edit target, so it recomposes once
+        lights_layer = Sdf.Layer.CreateAnonymous("lights")
+        light_positions = mesh_transform = None
+        
         # Process lighting if .house file is available
-        if files['house_file']:
-            print("\n💡 Processing Matterport lighting data...")
+        if house_future:
+            log.info("\n💡 Processing Matterport lighting data...")
             
             # Parse house file
-            house_data = self.parse_house_file(files['house_file'])
+            house_data = house_future.result()
             
             # Extract light positions
             light_positions = self.extract_light_positions(house_data)
             
             # Get house mesh transform to align coordinates
-            print("\n🔍 Analyzing house mesh coordinate system...")
-            mesh_transform = self.get_house_mesh_transform()
-            
-            # Transform light positions to match house orientation
-            print("\n🔄 Applying coordinate transformation for house orientation...")
-            # Since house has 90° X rotation, apply same to light positions
-            light_positions = self.apply_matterport_rotation(light_positions)
-
-            scaled_light_positions = self.scale_light_positions(light_positions, mesh_transform, house_data['header'])
+            log.info("\n🔍 Analyzing house mesh coordinate system...")
+            mesh_transform = self.get_house_mesh_transform(house_name, files['usd_file'])
             
-            # Create lights
-            room_lights = self.create_matterport_lights(scaled_light_positions, mesh_transform)
-            ambient_lights = self.add_ambient_lighting()
+            # Transform light positions to match house orientation and scale
+            if mesh_transform is not None:
+                log.info("\n🔄 Applying coordinate transformation for house orientation...")
+                # Since house has 90° X rotation, apply same to light positions, fused with the scale/translate
+                scaled_light_positions = self.apply_world_transform(light_positions, mesh_transform,
+                                                                    house_data['header'])
+            else:
+                # Nothing to align to: say so before any light is placed in raw .house coordinates
+                log.warning("\n⚠️  No house mesh found - using original coordinate system (no transform applied)")
+                scaled_light_positions = light_positions
             
-            print(f"\n✨ Lighting Summary:")
-            print(f"   Room-based lights: {room_lights}")
-            print(f"   Ambient lights: {ambient_lights}")
-            print(f"   Total lights: {room_lights + ambient_lights}")
+            # Create lights in the scratch layer; the stage only sees them once _commit_lights_layer
+            # copies them over in its own change block
+            room_lights = self.create_matterport_lights(scaled_light_positions, mesh_transform, lights_layer)
+            ambient_lights = self.add_ambient_lighting(lights_layer)
             
-            # Show coordinate system info
-            if mesh_transform:
-                print(f"\n🌐 Coordinate System:")
-                print(f"   House mesh center: ({mesh_transform['center'][0]:.1f}, {mesh_transform['center'][1]:.1f}, {mesh_transform['center'][2]:.1f})")
-                print(f"   Lights positioned relative to house mesh")
-            else:
-                print(f"\n⚠️  Using original coordinate system (no transform applied)")
+            # Build the summary block and emit it as a single record
+            if log.isEnabledFor(logging.INFO):
+                summary = [
+                    "\n✨ Lighting Summary:",
+                    f"   Room-based lights: {room_lights}",
+                    f"   Ambient lights: {ambient_lights}",
+                    f"   Total lights: {room_lights + ambient_lights}"
+                ]
+                
+                # Show coordinate system info
+                if mesh_transform:
+                    center = mesh_transform['center']
+                    summary += [
+                        "\n🌐 Coordinate System:",
+                        f"   House mesh center: ({center[0]:.1f}, {center[1]:.1f}, {center[2]:.1f})",
+                        "   Lights positioned relative to house mesh"
+                    ]
+                log.info("\n".join(summary))
             
         else:
-            print("\n⚠️  No .house file found - adding basic lighting only")
-            ambient_lights = self.add_ambient_lighting()
-            print(f"✨ Added {ambient_lights} basic lights")
+            log.warning("\n⚠️  No .house file found - adding basic lighting only")
+            ambient_lights = self.add_ambient_lighting(lights_layer)
+            log.info("✨ Added %d basic lights", ambient_lights)
+        
+        # Only a fully authored layer reaches the stage; if anything above raised, it is simply dropped
+        self._commit_lights_layer(lights_layer)
+        self.light_configs[house_name] = self.light_config(light_positions, mesh_transform)
+        
+        if save_usd:
+            return self.save_lit_stage(house_name, files['usd_file'])
+        
+        return True
+    
+    def _dry_run_house(self, house_name: str, files: Dict[str, str], house_future) -> bool:
+        """Run the parsing and coordinate math of process_house and record what would be authored"""
+        
+        light_positions = mesh_transform = None
+        if house_future:
+            house_data = house_future.result()
+            light_positions = self.extract_light_positions(house_data)
+            mesh_transform = self.get_house_mesh_transform(house_name, files['usd_file'])
+            if mesh_transform is not None:
+                self.apply_world_transform(light_positions, mesh_transform, house_data['header'])
+        else:
+            log.warning("\n⚠️  No .house file found - only ambient lights would be added")
+        
+        config = self.light_config(light_positions, mesh_transform)
+        self.light_configs[house_name] = config
         
+        log.info("🧪 Dry run: %d room lights and %d ambient lights would be authored (nothing written)",
+                 len(config['room_lights']), len(config['ambient_lights']))
+        for light in config['room_lights'] + config['ambient_lights']:
+            log.debug("    %s", light['prim_path'])
         return True
+    
+    def _commit_lights_layer(self, lights_layer):
+        """Copy the light groups authored in the scratch layer into the stage's edit target layer
+        
+        Each defined group root replaces whatever spec the edit layer already holds at that path, so
+        lights from an earlier run (e.g. in a USD saved after re-lighting) can't override the new ones,
+        and a save from Kit keeps the lights in the stage's own layer.
+        """
+        
+        # Topmost `def` specs of the scratch layer; their `over` ancestors only exist to parent them
+        group_roots = []
+        pending = list(lights_layer.rootPrims)
+        while pending:
+            prim_spec = pending.pop()
+            if prim_spec.specifier == Sdf.SpecifierDef:
+                group_roots.append(prim_spec.path)
+            else:
+                pending.extend(prim_spec.nameChildren)
+        
+        stage = omni.usd.get_context().get_stage()
+        edit_layer = stage.GetEditTarget().GetLayer()
+        with Sdf.ChangeBlock():
+            for group_root in group_roots:
+                # Like UsdStage::DefinePrim, give every ancestor the stage doesn't define yet a typeless
+                # `def`; under an implicit `over` (e.g. no /World) the lights would not be defined and
+                # traversal and imaging would skip them
+                for ancestor in group_root.GetPrefixes()[:-1]:
+                    ancestor_prim = stage.GetPrimAtPath(ancestor)
+                    if not (ancestor_prim and ancestor_prim.IsDefined()):
+                        Sdf.CreatePrimInLayer(edit_layer, ancestor).specifier = Sdf.SpecifierDef
+                
+                # CreatePrimInLayer makes sure the parent specs exist for CopySpec
+                Sdf.CreatePrimInLayer(edit_layer, group_root)
+                Sdf.CopySpec(lights_layer, group_root, edit_layer, group_root)
+        
+        # The house subtree just changed, so cached bounds under it are stale
+        if self._bbox_cache is not None:
+            self._bbox_cache.Clear()
+    
+    def save_lit_stage(self, house_name: str, usd_file: str) -> bool:
+        """Export the lit stage as <house_name>_lit.usd next to the source USD file"""
+        
+        lit_usd_path = os.path.join(os.path.dirname(usd_file), f"{house_name}_lit{USD_EXTENSION}")
+        
+        try:
+            # Flatten so the export stands alone, whichever layers the lights were authored into
+            stage = omni.usd.get_context().get_stage()
+            if not stage.Export(lit_usd_path):
+                log.error("❌ Failed to export lit stage to %s", lit_usd_path)
+                return False
+            
+            log.info("💾 Saved lit stage: %s", lit_usd_path)
+            return True
+            
+        except Exception as e:
+            log.error("❌ Error exporting lit stage to %s: %s", lit_usd_path, e)
+            return False
 
 
 def main():
     """Main function"""
     
-    print("🚀 Starting Matterport USD Lighting System")
-    print("=" * 60)
+    log.info("🚀 Starting Matterport USD Lighting System\n%s", "=" * 60)
     
-    parser = argparse.ArgumentParser(description="Load Matterport USD with intelligent lighting")
-    parser.add_argument("--house_name", required=True, help="House name (e.g., 1LXtFkjw3qL)")
-    parser.add_argument("--usd_path", help="Custom path to USD file (optional)")
-    parser.add_argument("--save_config", help="Save lighting configuration to JSON file")
-    parser.add_argument("--debug_coords", action="store_true", help="Show coordinate transformation details")
+    # Arguments were already parsed at import time, before Isaac Sim was launched
+    log.info("✅ Arguments parsed successfully:\n   House name: %s\n   USD path: %s",
+             ", ".join(args.house_name), args.usd_path)
     
-    try:
-        args = parser.parse_args()
-        print(f"✅ Arguments parsed successfully:")
-        print(f"   House name: {args.house_name}")
-        print(f"   USD path: {args.usd_path}")
-        
-    except Exception as e:
-        print(f"❌ Error parsing arguments: {e}")
-        return 1
+    # Only one stage is open at a time, so without --save_usd every house but the last is discarded
+    if len(args.house_name) > 1 and not args.save_usd and not args.dry_run:
+        log.warning("⚠️  Processing %d houses without --save_usd: only the last lit stage is kept",
+                    len(args.house_name))
     
     # Initialize the system
     try:
-        print("🔧 Initializing lighting system...")
-        lighting_system = MatterportLightingSystem()
-        print("✅ Lighting system initialized")
+        log.info("🔧 Initializing lighting system...")
+        lighting_system = MatterportLightingSystem(dry_run=args.dry_run)
+        log.info("✅ Lighting system initialized")
         
     except Exception as e:
-        print(f"❌ Error initializing lighting system: {e}")
+        log.error("❌ Error initializing lighting system: %s", e)
         return 1
     
     try:
-        # Process the house
-        print(f"🏠 Starting to process house: {args.house_name}")
-        success = lighting_system.process_house(args.house_name, args.usd_path)
-        
-        if success:
-            print("\n🎉 SUCCESS!")
+        # Process the houses one stage at a time in this Isaac Sim session, parsing ahead on the worker
+        lighting_system.prefetch_houses(args.house_name, args.usd_path)
+        failed = []
+        for house_name in args.house_name:
+            log.info("🏠 Starting to process house: %s", house_name)
+            try:
+                if not lighting_system.process_house(house_name, args.usd_path, args.save_usd):
+                    failed.append(house_name)
+            except Exception as e:
+                # One bad house (e.g. a .house file without a header) must not abandon the rest
+                log.exception("❌ Error processing house %s: %s", house_name, e)
+                failed.append(house_name)
+        
+        if not failed:
+            log.info("\n🎉 SUCCESS!")
         else:
-            print("\n❌ FAILED!")
-            print("Check the error messages above for details")
+            log.error("\n❌ FAILED: %s\nCheck the error messages above for details", ", ".join(failed))
             return 1
         
-        try:
-            while simulation_app.is_running():
+        if args.save_config:
+            with open(args.save_config, 'w') as f:
+                json.dump(lighting_system.light_configs, f, indent=2)
+            log.info("💾 Saved lighting configuration: %s", args.save_config)
+            
+            untransformed = [house_name for house_name, config in lighting_system.light_configs.items()
+                             if config['room_lights'] and not config['transformed']]
+            if untransformed:
+                log.warning("⚠️  Saved room light positions for %s are raw .house coordinates, not aligned "
+                            "to the house mesh (no mesh transform available)", ", ".join(untransformed))
+        
+        if args.exit_after_setup:
+            # Let the authored lights propagate for a few frames, then exit
+            for _ in range(SETTLE_FRAMES):
                 simulation_app.update()
-        except KeyboardInterrupt:
-            print("\n👋 Exiting...")
+        else:
+            try:
+                # Cap the viewer loop at ~60 Hz instead of spinning update() as fast as possible
+                while simulation_app.is_running():
+                    frame_start = time.monotonic()
+                    simulation_app.update()
+                    time.sleep(max(0.0, VIEWER_FRAME_TIME - (time.monotonic() - frame_start)))
+            except KeyboardInterrupt:
+                log.info("\n👋 Exiting...")
         
     except Exception as e:
-        print(f"❌ Unexpected error in main: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Unexpected error in main: %s", e)
         return 1
         
     finally:
         try:
             simulation_app.close()
-            print("🔚 Isaac Sim closed")
+            if not args.dry_run:
+                log.info("🔚 Isaac Sim closed")
         except Exception as e:
-            print(f"❌ Error closing Isaac Sim: {e}")
+            log.error("❌ Error closing Isaac Sim: %s", e)
     
     return 0
 
 
 if __name__ == "__main__":
-    import sys
     exit_code = main()
     sys.exit(exit_code)